@@ -0,0 +1,115 @@
+"""
+Compiled reduction kernels backing the statistical metrics.
+
+Numba is an optional dependency. If it is not installed, the kernels fall back
+to plain NumPy implementations with equivalent return values.
+
+@Author: Jannik Stebani 2024
+"""
+import numpy as np
+
+try:
+    import numba as nb
+except ImportError:
+    nb = None
+
+
+# Number of independent chunks the parallel reduction is split into.
+# Per-chunk partial results are merged with Chan's pairwise update.
+REDUCTION_CHUNKS: int = 64
+
+# Array dtypes for which the kernels are compiled.
+KERNEL_DTYPES: tuple[np.dtype, ...] = (np.dtype(np.float32), np.dtype(np.float64))
+
+
+def _fused_stats(x: np.ndarray) -> tuple[int, float, float, float, float]:
+    """
+    Compute count, mean, sample variance (ddof=1), minimum and maximum
+    of the flat, non-empty array `x` in a single pass over memory.
+    """
+    n = x.size
+    nchunks = min(n, REDUCTION_CHUNKS)
+    chunksize = (n + nchunks - 1) // nchunks
+    counts = np.zeros(nchunks, dtype=np.int64)
+    means = np.zeros(nchunks, dtype=np.float64)
+    m2s = np.zeros(nchunks, dtype=np.float64)
+    mins = np.empty(nchunks, dtype=np.float64)
+    maxs = np.empty(nchunks, dtype=np.float64)
+
+    for c in nb.prange(nchunks):
+        start = c * chunksize
+        stop = min(start + chunksize, n)
+        count = 0
+        mean = 0.0
+        m2 = 0.0
+        mn = np.inf
+        mx = -np.inf
+        for i in range(start, stop):
+            value = np.float64(x[i])
+            count += 1
+            delta = value - mean
+            mean += delta / count
+            m2 += delta * (value - mean)
+            if value < mn:
+                mn = value
+            if value > mx:
+                mx = value
+        counts[c] = count
+        means[c] = mean
+        m2s[c] = m2
+        mins[c] = mn
+        maxs[c] = mx
+
+    count = 0
+    mean = 0.0
+    m2 = 0.0
+    mn = np.inf
+    mx = -np.inf
+    for c in range(nchunks):
+        if counts[c] == 0:
+            continue
+        total = count + counts[c]
+        delta = means[c] - mean
+        mean += delta * counts[c] / total
+        m2 += m2s[c] + delta * delta * count * counts[c] / total
+        count = total
+        mn = min(mn, mins[c])
+        mx = max(mx, maxs[c])
+
+    var = m2 / (n - 1) if n > 1 else np.nan
+    return (n, mean, var, mn, mx)
+
+
+def _fused_stats_numpy(x: np.ndarray) -> tuple[int, float, float, float, float]:
+    """NumPy fallback for `fused_stats` if numba is not available."""
+    n = x.size
+    mean = np.mean(x, dtype=np.float64)
+    var = np.sum(np.square(x - mean, dtype=np.float64)) / (n - 1) if n > 1 else np.nan
+    return (n, float(mean), float(var), float(np.min(x)), float(np.max(x)))
+
+
+def as_kernel_input(x: np.ndarray) -> np.ndarray:
+    """
+    Flat, C-contiguous float32 or float64 view or copy of `x` matching
+    one of the compiled kernel signatures.
+    """
+    x = np.ravel(x)
+    if x.dtype not in KERNEL_DTYPES:
+        x = x.astype(np.float64)
+    return np.ascontiguousarray(x)
+
+
+if nb is not None:
+    # eagerly compiled and cached for the supported contiguous layouts;
+    # fastmath without the 'nnan'/'ninf' flags: non-finite values must still propagate
+    _signatures = [(nb.float32[::1],), (nb.float64[::1],)]
+    _options = dict(fastmath={'reassoc', 'contract', 'arcp'}, boundscheck=False,
+                    nogil=True, cache=True)
+    fused_stats = nb.njit(_signatures, parallel=True, **_options)(_fused_stats)
+    # single-threaded variant for callers that parallelize over several arrays
+    # from a thread pool: concurrent launches of parallel kernels are not
+    # supported by all numba threading layers
+    fused_stats_serial = nb.njit(_signatures, **_options)(_fused_stats)
+else:
+    fused_stats = _fused_stats_numpy
+    fused_stats_serial = _fused_stats_numpy
@@ -3,32 +3,48 @@ Tooling for computing statistics with direct interfacing with segmentation infor
 
 @Author: Jannik Stebani 2024
 """
-from quantools.metrics.metrics_raw import compute_statistical_parameters
-from quantools.segmentinfo.segmentinfo import Segmentation, TissueROI
+import functools
+import os
 
+from concurrent.futures import ThreadPoolExecutor
 
+from quantools.metrics.metrics_raw import (compute_statistical_parameters,
+                                           compute_statistical_parameters_batched)
+from quantools.segmentinfo.segmentinfo import Segmentation, TissueROI
 
-def compute_volume(tissue: TissueROI) -> dict:
-    parameter = next(iter(tissue))
-    return {'volume' : parameter.values.size}
-
-
-def compute_tissue_statistics(tissue: TissueROI) -> dict:
-    parameter_statistics = {}
-    for parameter in tissue:
-        parameter_statistics[
-            parameter.name
-        ] = compute_statistical_parameters(parameter.values)
-    
-    statistics = {tissue.name : parameter_statistics}
-    statistics[tissue.name].update(compute_volume(tissue))
-    return statistics
 
 
-def compute_statistics(data: Segmentation | TissueROI):
+def compute_volume(tissue: TissueROI) -> dict:
+    return {'volume' : tissue.volume}
+
+
+def compute_tissue_statistics(tissue: TissueROI, parallel: bool = True) -> dict:
+    if tissue.parameters_matrix is not None:
+        # batched reduction over the rows of the shared parameter matrix
+        rows = compute_statistical_parameters_batched(tissue.parameters_matrix, parallel=parallel)
+        parameter_statistics = {
+            parameter.name : rows[parameter.row_index] for parameter in tissue
+        }
+    else:
+        parameter_statistics = {
+            parameter.name : compute_statistical_parameters(parameter.values, parallel=parallel)
+            for parameter in tissue
+        }
+    return {tissue.name : {**parameter_statistics, 'volume' : tissue.volume}}
+
+
+def compute_statistics(data: Segmentation | TissueROI, max_workers: int | None = None):
+    """
+    Compute statistics for a single tissue or all tissues of a segmentation.
+    Tissues are processed concurrently by a thread pool with `max_workers`
+    threads (default: CPU count). Each tissue then uses the single-threaded kernels.
+    """
     if isinstance(data, TissueROI):
         return compute_tissue_statistics(data)
+    compute = functools.partial(compute_tissue_statistics, parallel=False)
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        results = list(executor.map(compute, data))
     statistics = {}
-    for tissue in data:
-        statistics.update(compute_tissue_statistics(tissue))
-    return statistics
\ No newline at end of file
+    for result in results:
+        statistics.update(result)
+    return statistics
@@ -6,17 +6,132 @@ Compute quantitative metrics for maps.
 import numpy as np
 from collections.abc import Mapping
 
+from quantools.metrics._kernels import as_kernel_input, fused_stats, fused_stats_serial
 
-def compute_statistical_parameters(data: np.ndarray) -> dict:
+
+QUANTILES: tuple[float, float] = (0.05, 0.95)
+
+
+def _quantile_indices(n: int, q: float) -> tuple[int, int, float]:
+    """
+    Lower and upper order statistic index and interpolation weight
+    for the quantile `q`, matching the default 'linear' method of `np.quantile`.
+    """
+    virtual = n * q + (1 - q) - 1
+    lower = min(max(int(np.floor(virtual)), 0), n - 1)
+    upper = min(lower + 1, n - 1)
+    return (lower, upper, virtual - np.floor(virtual))
+
+
+def _lerp(a: float, b: float, t: float) -> float:
+    """Linear interpolation in the numerically stable form used by NumPy."""
+    diff = b - a
+    if t >= 0.5:
+        return b - diff * (1 - t)
+    return a + diff * t
+
+
+def compute_statistical_parameters_reference(data: np.ndarray) -> dict:
+    """
+    Straightforward multi-pass NumPy implementation.
+    Used for empty and non-finite data where the exact NumPy semantics
+    (errors, NaN propagation) are desired.
+    """
     return {
-        'mean' : np.mean(data),
-        'stdev' : np.std(data, ddof=1),
-        'max' : np.max(data),
-        'min' : np.min(data),
-        'median' : np.median(data),
-        'q_95' : np.quantile(data, q=0.95),
-        'q_05' : np.quantile(data, q=0.05),
+        'mean' : float(np.mean(data)),
+        'stdev' : float(np.std(data, ddof=1)),
+        'max' : float(np.max(data)),
+        'min' : float(np.min(data)),
+        'median' : float(np.median(data)),
+        'q_95' : float(np.quantile(data, q=0.95)),
+        'q_05' : float(np.quantile(data, q=0.05)),
+    }
+
+
+def _order_statistic_indices(n: int) -> tuple[tuple[int, ...], dict, list[int]]:
+    """
+    Indices of the median elements, the quantile index triplets and the
+    joint sorted `kth` argument for a single `np.partition` call.
+    """
+    median_indices = (n // 2,) if n % 2 else (n // 2 - 1, n // 2)
+    quantile_indices = {q : _quantile_indices(n, q) for q in QUANTILES}
+    kth = sorted(
+        set(median_indices).union(*(indices[:2] for indices in quantile_indices.values()))
+    )
+    return (median_indices, quantile_indices, kth)
+
+
+def _assemble_statistics(moments: tuple, partitioned: np.ndarray,
+                         median_indices: tuple[int, ...], quantile_indices: dict) -> dict:
+    """
+    Combine kernel moments and partitioned order statistics into the result
+    dict. All values are Python floats, independent of the data dtype.
+    """
+    _, mean, var, minimum, maximum = moments
+    quantiles = {
+        q : _lerp(partitioned[lower], partitioned[upper], gamma)
+        for q, (lower, upper, gamma) in quantile_indices.items()
     }
+    return {
+        'mean' : float(mean),
+        'stdev' : float(np.sqrt(var)),
+        'max' : float(maximum),
+        'min' : float(minimum),
+        'median' : float(partitioned[list(median_indices)].mean()),
+        'q_95' : float(quantiles[0.95]),
+        'q_05' : float(quantiles[0.05]),
+    }
+
+
+def compute_statistical_parameters(data: np.ndarray, parallel: bool = True) -> dict:
+    """
+    Compute mean, standard deviation, extrema, median and 5/95 % quantiles.
+
+    Moments and extrema are computed by a fused single-pass kernel.
+    The order statistics are selected by a single `np.partition` call
+    instead of independent full sorts for median and quantiles.
+    Set `parallel` to False to use the single-threaded kernel, e.g. if
+    called concurrently from a thread pool.
+    """
+    data = np.ravel(data)
+    n = data.size
+    if n == 0:
+        return compute_statistical_parameters_reference(data)
+
+    kernel = fused_stats if parallel else fused_stats_serial
+    moments = kernel(as_kernel_input(data))
+    if not np.isfinite(moments[1]):
+        return compute_statistical_parameters_reference(data)
+
+    median_indices, quantile_indices, kth = _order_statistic_indices(n)
+    partitioned = np.partition(data, kth)
+    return _assemble_statistics(moments, partitioned, median_indices, quantile_indices)
+
+
+def compute_statistical_parameters_batched(matrix: np.ndarray, parallel: bool = True) -> list[dict]:
+    """
+    Compute the statistical parameters for every row of the 2D `matrix`.
+
+    The order statistics of all rows are selected by one `np.partition`
+    call along the last axis.
+    """
+    n = matrix.shape[-1]
+    if n == 0:
+        return [compute_statistical_parameters_reference(row) for row in matrix]
+
+    median_indices, quantile_indices, kth = _order_statistic_indices(n)
+    partitioned = np.partition(matrix, kth, axis=-1)
+    kernel = fused_stats if parallel else fused_stats_serial
+    statistics = []
+    for row, partitioned_row in zip(matrix, partitioned):
+        moments = kernel(as_kernel_input(row))
+        if not np.isfinite(moments[1]):
+            statistics.append(compute_statistical_parameters_reference(row))
+            continue
+        statistics.append(
+            _assemble_statistics(moments, partitioned_row, median_indices, quantile_indices)
+        )
+    return statistics
 
 
 def compute_volume(maps: Mapping) -> dict:
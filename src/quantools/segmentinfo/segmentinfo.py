@@ -3,6 +3,8 @@ Tooling to programmatically interact with parsed segmentation information.
 
 @Author: Jannik Stebani 2024
 """
+import operator
+
 from collections.abc import Mapping
 from typing import Literal
 
@@ -21,11 +23,126 @@ def value_repr(obj) -> str:
         return str(obj)
 
 
+# Contiguous-run gathers are only used if the mask compresses into at least
+# this many true voxels per run on average.
+MIN_VOXELS_PER_RUN: int = 16
+
+
+def mask_run_edges(mask_flat: np.ndarray) -> np.ndarray:
+    """
+    Alternating start and stop indices of the contiguous runs of true
+    elements of a flat boolean mask.
+    """
+    # compare neighbours in the boolean dtype: no widened copies of the mask
+    edges = np.flatnonzero(mask_flat[1:] != mask_flat[:-1])
+    edges += 1
+    if mask_flat.size and mask_flat[0]:
+        edges = np.concatenate(([0], edges))
+    if mask_flat.size and mask_flat[-1]:
+        edges = np.concatenate((edges, [mask_flat.size]))
+    return edges
+
+
+def edges_to_slices(edges: np.ndarray) -> list[slice]:
+    """Slices covering the runs given by alternating start and stop indices."""
+    return [slice(start, stop) for start, stop in zip(edges[::2].tolist(), edges[1::2].tolist())]
+
+
+def mask_to_slices(mask_flat: np.ndarray) -> list[slice]:
+    """
+    Compress a flat boolean mask into the list of slices covering its
+    contiguous runs of true elements.
+    """
+    return edges_to_slices(mask_run_edges(mask_flat))
+
+
+# Canonical parameter names in storage order
+CANONICAL_PARAMETERS: tuple[str, ...] = ('T1', 'T2', 'M0', 'IP')
+
+
+def flatten_parameter_maps(maps: Mapping[str, np.ndarray],
+                           shape: tuple[int, ...]) -> dict[str, np.ndarray]:
+    """
+    Flat C-order arrays of the canonical parameter maps present in `maps`.
+    Maps that are not C-contiguous are copied here, so flatten once and
+    reuse the result for all tissues of a segmentation.
+    Missing or non-array entries are skipped.
+    """
+    flat_maps = {}
+    for parameter_name in CANONICAL_PARAMETERS:
+        try:
+            parameter_map = maps[parameter_name]
+            if parameter_map.shape != tuple(shape):
+                raise ValueError(
+                    f'shape mismatch for parameter {parameter_name}: map '
+                    f'{parameter_map.shape} and mask {tuple(shape)}'
+                )
+            flat_maps[parameter_name] = parameter_map.reshape(-1)
+        except (TypeError, KeyError, AttributeError):
+            continue
+    return flat_maps
+
+
+def values_dtype(dtype: np.dtype) -> np.dtype:
+    """Storage dtype for parameter values: float32 and float64 are kept, others map to float32."""
+    dtype = np.dtype(dtype)
+    return dtype if dtype in (np.float32, np.float64) else np.dtype(np.float32)
+
+
+def as_contiguous_values(values: np.ndarray) -> np.ndarray:
+    """
+    Normalize parameter values to a C-contiguous float array of the
+    storage dtype. Already conforming arrays are returned without copy.
+    """
+    if values is None:
+        return None
+    values = np.asarray(values)
+    return np.ascontiguousarray(values, dtype=values_dtype(values.dtype))
+
+
 @attrs.define
 class ParameterROI:
+    """
+    Values of a single parameter inside a tissue ROI.
+
+    The values are normalized to a C-contiguous float array on assignment.
+    For tissues created from parameter maps, the values are a view of row
+    `row_index` of the parameter `matrix` that is shared by all parameters
+    of the tissue (structure of arrays layout).
+    """
     name: str
-    values: np.ndarray | None = attrs.field(repr=value_repr)
+    values: np.ndarray | None = attrs.field(repr=value_repr, converter=as_contiguous_values)
     unit: Unit
+    matrix: np.ndarray | None = attrs.field(default=None, kw_only=True, repr=False, eq=False)
+    row_index: int = attrs.field(default=0, kw_only=True, repr=False, eq=False)
+
+    # lazily computed and cached summary values
+    _mean: float | None = attrs.field(init=False, default=None, repr=False, eq=False)
+    _min: float | None = attrs.field(init=False, default=None, repr=False, eq=False)
+    _max: float | None = attrs.field(init=False, default=None, repr=False, eq=False)
+
+    @property
+    def mean(self) -> float:
+        if self._mean is None:
+            self._mean = float(self.values.mean(dtype=np.float64))
+        return self._mean
+
+    @property
+    def min(self) -> float:
+        if self._min is None:
+            self._min = float(self.values.min())
+        return self._min
+
+    @property
+    def max(self) -> float:
+        if self._max is None:
+            self._max = float(self.values.max())
+        return self._max
+
+    @classmethod
+    def from_values(cls, name: str, values: np.ndarray, unit: Unit) -> 'ParameterROI':
+        """Create parameter ROI from a standalone 1D value array."""
+        return cls(name=name, values=values, unit=unit)
 
 
 @attrs.define
@@ -43,54 +160,137 @@ class TissueROI:
         Dictionary mapping parameter names to ParameterROI objects.
         Usually T1 or T2 that then is related to the values and unit inside the ParameterROI object.
 
-    mask : np.ndarray
-        Mask of the tissue.
+    mask : np.ndarray | None
+        Mask of the tissue. None for tissues created from a label volume.
 
-    volume : int
+    volume : int | None
         Total volume of the tissue in voxel units.
+        Computed from the mask if not given. Keyword-only.
 
     color : str | None
         Color specification for the tissue.
         Can be used in downstream visualizations.
         Default is None.
+
+    parameters_matrix : np.ndarray | None
+        Contiguous (parameter, voxel) array holding the values of all parameters.
+        The ParameterROI values are row views into this matrix.
+        Default is None.
     """
     name: str
     parameters: dict[str, ParameterROI]
-    mask: np.ndarray = attrs.field(repr=lambda arr: f'(shape={arr.shape}, dtype={arr.dtype}')
-    volume: int = attrs.field(init=False)
+    mask: np.ndarray | None = attrs.field(repr=False)
     color: str | None = None
+    parameters_matrix: np.ndarray | None = attrs.field(default=None, repr=False)
+    volume: int | None = attrs.field(default=None, kw_only=True)
+
+    # non-parameter attributes that are accessible via item lookup
+    _item_attributes = frozenset(('mask', 'name', 'volume'))
         
     def __attrs_post_init__(self):
-        self.volume = np.sum(self.mask)
+        if self.volume is None:
+            self.volume = int(np.count_nonzero(self.mask))
         
+    def __repr__(self) -> str:
+        return (f'{self.__class__.__name__}(name={self.name!r}, parameters={self.parameters!r}, '
+                f'mask={value_repr(self.mask)}, volume={self.volume}, color={self.color!r})')
+
     def __getitem__(self, item_name: str) -> ParameterROI | np.ndarray:
-        mapping = {**self.parameters, 'mask' : self.mask, 'name' : self.name, 'volume' : self.volume}
-        return mapping[item_name]
+        parameter = self.parameters.get(item_name)
+        if parameter is not None:
+            return parameter
+        if item_name in self._item_attributes:
+            return getattr(self, item_name)
+        raise KeyError(item_name)
     
     def __iter__(self):
         return iter(self.parameters.values())
     
     @classmethod
     def create_from(cls, name: str, maps: Mapping[str, np.ndarray], mask: np.ndarray,
-                    unit: str | Unit = 'seconds', color: str | None = None):
-        """Create single tissue ROI specification."""
+                    unit: str | Unit = 'seconds', color: str | None = None,
+                    dtype: np.dtype | None = np.float32,
+                    flat_maps: Mapping[str, np.ndarray] | None = None):
+        """
+        Create single tissue ROI specification.
+        Parameter values are cast to `dtype` at ingestion. Set to None to keep
+        the common dtype of the input maps.
+        Pass the result of `flatten_parameter_maps` as `flat_maps` to reuse
+        flattened maps across tissues.
+        """
+        # scan the mask once and reuse the flat indices for every parameter map
+        mask_flat = mask.ravel()
+        flat_idx = np.flatnonzero(mask_flat)
+
+        # segmentation masks often consist of few long runs: copy these as contiguous blocks
+        slices = None
+        if flat_idx.size > 0 and mask_flat.dtype == bool:
+            # decide on the run count before building any slice objects
+            edges = mask_run_edges(mask_flat)
+            if edges.size // 2 < flat_idx.size // MIN_VOXELS_PER_RUN:
+                slices = edges_to_slices(edges)
+
+        return cls.create_from_indices(name=name, maps=maps, flat_idx=flat_idx, shape=mask.shape,
+                                       mask=mask, unit=unit, color=color, dtype=dtype,
+                                       slices=slices, flat_maps=flat_maps)
+
+    @classmethod
+    def create_from_indices(cls, name: str, maps: Mapping[str, np.ndarray], flat_idx: np.ndarray,
+                            shape: tuple[int, ...], mask: np.ndarray | None = None,
+                            unit: str | Unit = 'seconds', color: str | None = None,
+                            dtype: np.dtype | None = np.float32,
+                            slices: list[slice] | None = None,
+                            flat_maps: Mapping[str, np.ndarray] | None = None):
+        """
+        Create single tissue ROI specification from the flat indices of its
+        voxels within volumes of the given `shape`.
+        If `slices` covering the same voxels are given, the values are gathered
+        as contiguous blocks instead.
+        If given, `flat_maps` are used instead of flattening `maps`.
+        """
         if not isinstance(unit, Unit):
             unit = Unit(unit)
 
+        volume = int(flat_idx.size)
         parameters = {}
-        canonical_parameters = [('T1', unit), ('T2', unit), ('M0', Unit.NONE), ('IP', Unit.NONE)]
-        for parameter_name, parameter_unit in canonical_parameters:
-            try:
-                values = maps[parameter_name][mask]
-            except (TypeError, KeyError):
-                continue
+        if volume == 0:
+            return cls(name=name, mask=mask, parameters=parameters, color=color, volume=volume)
+
+        if flat_maps is None:
+            flat_maps = flatten_parameter_maps(maps, shape)
+        parameter_units = {'T1' : unit, 'T2' : unit, 'M0' : Unit.NONE, 'IP' : Unit.NONE}
+        present_parameters = [
+            (parameter_name, parameter_units[parameter_name], map_flat)
+            for parameter_name, map_flat in flat_maps.items()
+        ]
+
+        if not present_parameters:
+            return cls(name=name, mask=mask, parameters=parameters, color=color, volume=volume)
+
+        if dtype is None:
+            dtype = np.result_type(*(map_flat for _, _, map_flat in present_parameters))
+        dtype = values_dtype(dtype)
+        matrix = np.empty((len(present_parameters), volume), dtype=dtype)
+        for row_index, (parameter_name, parameter_unit, map_flat) in enumerate(present_parameters):
+            if slices is None:
+                if map_flat.dtype == dtype:
+                    # indices are valid by construction: 'clip' writes into `out` unbuffered
+                    np.take(map_flat, flat_idx, out=matrix[row_index], mode='clip')
+                else:
+                    # take() would buffer a dtype-mismatched `out` through a cast
+                    # of its uninitialized contents: gather, then cast on assignment
+                    matrix[row_index] = map_flat.take(flat_idx)
+            else:
+                np.concatenate([map_flat[s] for s in slices], out=matrix[row_index])
 
             parameters[parameter_name] = ParameterROI(name=parameter_name,
-                                                      values=values,
-                                                      unit=parameter_unit)
+                                                      values=matrix[row_index],
+                                                      unit=parameter_unit,
+                                                      matrix=matrix,
+                                                      row_index=row_index)
         
-        return cls(name=name, mask=mask, parameters=parameters, color=color)
-    
+        return cls(name=name, mask=mask, parameters=parameters, color=color,
+                   parameters_matrix=matrix, volume=volume)    
 
     
 @attrs.define
@@ -98,14 +298,24 @@ class Segmentation:
     tissues: list[TissueROI]
         
     sort: Literal['none', 'increasing', 'decreasing'] = 'decreasing'
+
+    _name_index: dict[str, int] = attrs.field(init=False, repr=False, eq=False)
+    # (tissues list, length) the name index was built for
+    _indexed: tuple[list, int] = attrs.field(init=False, repr=False, eq=False)
         
     def __attrs_post_init__(self):
-        if self.sort == 'none':
-            return
-        self.tissues = list(sorted(self.tissues, key=lambda tissue: tissue.volume))
-        if self.sort == 'decreasing':
-            self.tissues = list(reversed(self.tissues))
+        if self.sort != 'none':
+            self.tissues = sorted(self.tissues, key=operator.attrgetter('volume'),
+                                  reverse=(self.sort == 'decreasing'))
+        self._build_name_index()
         return
+
+    def _build_name_index(self) -> None:
+        # reversed iteration: the first tissue with a given name wins
+        self._name_index = {
+            tissue.name : index for index, tissue in reversed(list(enumerate(self.tissues)))
+        }
+        self._indexed = (self.tissues, len(self.tissues))
         
     def __iter__(self):
         return iter(self.tissues)
@@ -117,17 +327,72 @@ class Segmentation:
         """
         if isinstance(item, int):
             return self.tissues[item]
-        
-        names = [tissue.name for tissue in self.tissues]
-        return self.tissues[names.index(item)]
+        indexed_tissues, indexed_length = self._indexed
+        # the tissues list may have been replaced or modified since indexing
+        if indexed_tissues is not self.tissues or indexed_length != len(self.tissues):
+            self._build_name_index()
+        index = self._name_index.get(item)
+        if index is None or self.tissues[index].name != item:
+            self._build_name_index()
+            index = self._name_index.get(item)
+        if index is None:
+            raise ValueError(f'{item!r} is not in segmentation')
+        return self.tissues[index]
         
     
     @classmethod
-    def create_from(cls, parameters: Mapping[str, np.ndarray], masks: Mapping[str, np.ndarray]):
+    def create_from(cls, parameters: Mapping[str, np.ndarray], masks: Mapping[str, np.ndarray],
+                    dtype: np.dtype | None = np.float32):
         tissues = []
+        # mask shape -> flattened parameter maps, shared by all tissues
+        flat_maps = {}
         for tissue_name, mask in masks.items():
+            color = get_canonical_tissue_color(tissue_name)
+            if mask.shape not in flat_maps:
+                flat_maps[mask.shape] = flatten_parameter_maps(parameters, mask.shape)
+            tissues.append(
+                TissueROI.create_from(name=tissue_name, maps=parameters, mask=mask, color=color,
+                                      dtype=dtype, flat_maps=flat_maps[mask.shape])
+            )
+        return cls(tissues=tissues)
+
+    @classmethod
+    def create_from_labels(cls, parameters: Mapping[str, np.ndarray], labels: np.ndarray,
+                           label_names: Mapping[int, str], dtype: np.dtype | None = np.float32):
+        """
+        Create segmentation from an integer label volume.
+
+        The voxel indices of all labels are obtained from a single stable sort
+        of the label volume. No per-tissue boolean mask is materialized, so the
+        resulting tissues have `mask` set to None.
+
+        Parameters
+        ----------
+
+        parameters : Mapping[str, np.ndarray]
+            Parameter maps with the same shape as `labels`.
+
+        labels : np.ndarray
+            Integer label volume.
+
+        label_names : Mapping[int, str]
+            Mapping of label values to tissue names. Labels not present
+            in this mapping (e.g. background) are ignored.
+        """
+        labels_flat = labels.ravel()
+        sort_idx = np.argsort(labels_flat, kind='stable')
+        sorted_labels = labels_flat[sort_idx]
+        label_values = np.fromiter(label_names.keys(), dtype=labels_flat.dtype, count=len(label_names))
+        starts = np.searchsorted(sorted_labels, label_values, side='left')
+        stops = np.searchsorted(sorted_labels, label_values, side='right')
+
+        flat_maps = flatten_parameter_maps(parameters, labels.shape)
+        tissues = []
+        for (label, tissue_name), start, stop in zip(label_names.items(), starts, stops):
             color = get_canonical_tissue_color(tissue_name)
             tissues.append(
-                TissueROI.create_from(name=tissue_name, maps=parameters, mask=mask, color=color)
+                TissueROI.create_from_indices(name=tissue_name, maps=parameters,
+                                              flat_idx=sort_idx[start:stop], shape=labels.shape,
+                                              color=color, dtype=dtype, flat_maps=flat_maps)
             )
-        return cls(tissues=tissues)
\ No newline at end of file
+        return cls(tissues=tissues)
@@ -0,0 +1,81 @@
+"""
+Compiled element-wise kernels for interactive visualization.
+
+Numba is an optional dependency. If it is not installed, the kernels fall back
+to plain NumPy implementations with equivalent results.
+
+@Author: Jannik Stebani 2024
+"""
+import numpy as np
+
+try:
+    import numba as nb
+except ImportError:
+    nb = None
+
+
+# Floating point dtypes that are passed to the compiled kernel without cast.
+KERNEL_DTYPES: tuple[np.dtype, ...] = (np.dtype(np.float32), np.dtype(np.float64))
+
+
+def _quantize_u8(src: np.ndarray, scale: float, vmin: float, max_level: int,
+                 out: np.ndarray) -> None:
+    """
+    Write `(src - vmin) * scale` truncated and clipped to [0, max_level]
+    into the uint8 array `out`. Both arrays are flat and contiguous.
+    Non-finite values map to 0 and max_level respectively.
+    """
+    for i in nb.prange(src.size):
+        value = (src[i] - vmin) * scale
+        if value >= max_level:
+            out[i] = max_level
+        elif value >= 0:
+            out[i] = np.uint8(value)
+        else:
+            out[i] = 0
+
+
+def _quantize_u8_numpy(src: np.ndarray, scale: float, vmin: float, max_level: int,
+                       out: np.ndarray) -> None:
+    """NumPy fallback for `_quantize_u8` if numba is not available."""
+    with np.errstate(invalid='ignore'):
+        buffer = np.subtract(src, vmin, dtype=np.float32)
+        np.multiply(buffer, scale, out=buffer)
+    # map non-finite values like the compiled kernel
+    np.nan_to_num(buffer, copy=False, nan=0.0, posinf=max_level, neginf=0.0)
+    np.clip(buffer, 0, max_level, out=buffer)
+    np.copyto(out, buffer, casting='unsafe')
+
+
+def as_quantize_input(src: np.ndarray) -> np.ndarray:
+    """
+    Flat, C-contiguous view or copy of `src` with a dtype supported by the
+    compiled kernel: float32, float64 and integer arrays are kept, all other
+    dtypes (e.g. float16 or bool) are cast to float32.
+    """
+    if src.dtype not in KERNEL_DTYPES and src.dtype.kind not in 'iu':
+        src = src.astype(np.float32)
+    return np.ascontiguousarray(src).reshape(-1)
+
+
+if nb is not None:
+    # compiled lazily per source dtype; fastmath without the 'nnan'/'ninf' flags:
+    # the comparisons must still route non-finite values to the clip bounds
+    _quantize_u8_impl = nb.njit(parallel=True, fastmath={'reassoc', 'contract', 'arcp'},
+                                boundscheck=False, nogil=True, cache=True)(_quantize_u8)
+else:
+    _quantize_u8_impl = _quantize_u8_numpy
+
+
+def quantize_u8(src: np.ndarray, scale: float, vmin: float, out: np.ndarray,
+                max_level: int = 255) -> np.ndarray:
+    """
+    Quantize `src` to uint8 levels `(src - vmin) * scale`, truncated and
+    clipped to [0, max_level], writing into the preallocated `out` array
+    of identical shape. Returns `out`.
+    """
+    if src.shape != out.shape:
+        raise ValueError(f'shape mismatch: src {src.shape} and out {out.shape}')
+    _quantize_u8_impl(as_quantize_input(src), float(scale), float(vmin),
+                      max_level, out.reshape(-1))
+    return out
@@ -16,8 +16,7 @@ from matplotlib.figure import Figure
 from quantools.segmentinfo.segmentinfo import Segmentation, TissueROI
 from quantools.segmentinfo.unit import Unit
 from quantools.visualization.utils import (PARAMETER_NAME_REMAPPING,
-                                           get_canonical_axis_label,
-                                           get_color)
+                                           get_canonical_axis_label, get_figure)
 
 
 def draw_histogram(data: np.ndarray,
@@ -27,14 +26,24 @@ def draw_histogram(data: np.ndarray,
                    ax: Axes,
                    bins: int,
                    draw_mean: bool = True,
-                   color: str | None = None) -> Axes:
-    """Draw histogram into preexisting axes"""
-    mean = data.mean()
+                   color: str | None = None,
+                   bin_range: tuple[float, float] | None = None,
+                   mean: float | None = None) -> Axes:
+    """
+    Draw histogram into preexisting axes.
+    Counts are computed with `np.histogram` and drawn as filled stairs.
+    Pass `bin_range` to share identical bin edges across several histograms
+    and `mean` to reuse a precomputed mean of `data`.
+    """
+    if mean is None:
+        mean = data.mean()
     unit = f' {parameter_unit}' if parameter_unit else ''
     label = f'{tissue_label} ' + '$\\langle$' + f'{parameter_label}' + '$\\rangle$' + f' = {mean:.3f}{unit}'
 
-    _, _, patches = ax.hist(data, bins=bins, label=label, color=color)
-    color = get_color(patches)
+    counts, edges = np.histogram(data, bins=bins, range=bin_range)
+    color_kwargs = {'color' : color} if color is not None else {}
+    stairs = ax.stairs(counts, edges, label=label, fill=True, **color_kwargs)
+    color = stairs.get_facecolor()
     
     if draw_mean:    
         ax.axvline(x=mean, color=color, dashes=[4, 4], gapcolor='black', alpha=0.8)    
@@ -57,14 +66,26 @@ def plot_parameter(segmentation: Segmentation,
         fig, ax = plt.subplots()
     else:
         ax = ax
-        fig = ax.get_figure()
+        fig = get_figure(ax)
 
     ax.set_yscale(yscale)
     
     parameter_remapping = PARAMETER_NAME_REMAPPING | (parameter_remapping or {})
-    
-    for tissue in segmentation:
-        parameter = tissue[parameter_name]
+
+    parameters = [
+        (tissue, tissue.parameters[parameter_name])
+        for tissue in segmentation if parameter_name in tissue.parameters
+    ]
+    # shared bin edges across all tissues
+    bin_range = None
+    if parameters:
+        bin_range = (
+            min(parameter.min for _, parameter in parameters),
+            max(parameter.max for _, parameter in parameters)
+        )
+
+    labels = {}
+    for tissue, parameter in parameters:
         
         if parameter.unit == Unit.SECONDS:
          unit = 's'
@@ -84,7 +105,8 @@ def plot_parameter(segmentation: Segmentation,
             
         draw_histogram(
             data=parameter.values, tissue_label=tissue.name, parameter_label=remapped_parameter_label, parameter_unit=unit,
-            bins=bins, draw_mean=draw_mean, ax=ax, color=color
+            bins=bins, draw_mean=draw_mean, ax=ax, color=color, bin_range=bin_range,
+            mean=parameter.mean
         )
     
     ax.set(**labels)
@@ -111,7 +133,7 @@ def plot_2D_histogram(tissue: TissueROI,
         fig, ax = plt.subplots()
     else:
         ax = ax
-        fig = ax.get_figure()
+        fig = get_figure(ax)
         
     T1 = tissue.T1.values
     T2 = tissue.T2.values
@@ -1,8 +1,13 @@
+import asyncio
+import functools
+
 import matplotlib
 import numpy as np
 import ipywidgets as wgt
 from cycler import Cycler, cycler
 
+from quantools.visualization._kernels import quantize_u8
+
 
 # Default property cyclers for LabelOverlayContainer classmethod
 LABEL_COLOR_SEQUENCE = ('#03fc20', '#fc0303', '#0307fc', '#f003fc')
@@ -10,8 +15,73 @@ LABEL_ALPHA_SEQUENCE = (1.0, 0.60, 0.33, 0.33)
 # cycle over 'value' argument: relevant keyword for ipywidgets instances
 DEFAULT_COLOR_CYCLE = cycler(value=LABEL_COLOR_SEQUENCE)
 DEFAULT_ALPHA_CYCLE = cycler(value=LABEL_ALPHA_SEQUENCE)
+# Number of steps along the alpha axis of label overlay colormaps
+DEFAULT_ALPHA_TICKS = 50
+# Time window in seconds over which rapid widget events are coalesced
+DEFAULT_COALESCE_DELAY = 0.03
+
+
+class Debouncer:
+    """
+    Coalesce rapid successive calls into a single deferred call.
+    Only the most recently submitted callable is executed, `delay` seconds
+    after the first submission of the current window. Runs on the asyncio
+    event loop of the kernel. Without a running loop, calls are executed
+    immediately.
+
+    Parameters
+    ----------
+
+    delay : float, optional
+        Coalescing time window in seconds.
+    """
+    def __init__(self, delay: float = DEFAULT_COALESCE_DELAY) -> None:
+        self.delay = delay
+        self._pending = None
+        self._handle = None
+
+    def submit(self, func) -> None:
+        """Schedule `func`, superseding any not yet executed callable."""
+        self._pending = func
+        if self._handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        self._handle = loop.call_later(self.delay, self.flush)
+
+    def flush(self) -> None:
+        """Execute the pending callable now."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        func, self._pending = self._pending, None
+        if func is not None:
+            func()
+
+
+def display_stride(shape: tuple[int, int], display_hw: tuple[int, int]) -> int:
+    """
+    Integer stride that downsamples a 2D slice of `shape` to no less than
+    the display size `display_hw` in pixels along both axes.
+    """
+    ratios = (size // max(int(disp), 1) for size, disp in zip(shape, display_hw))
+    return max(1, min(ratios))
+
+
+def strided_extent(shape: tuple[int, int], stride: int) -> tuple[float, float, float, float]:
+    """
+    Image extent of a slice of full-resolution `shape` subsampled by `stride`,
+    so that it occupies the data coordinates of the full-resolution slice.
+    """
+    height = -(-shape[0] // stride) * stride
+    width = -(-shape[1] // stride) * stride
+    return (-0.5, width - 0.5, height - 0.5, -0.5)
 
 
+@functools.lru_cache(maxsize=256)
 def hex_to_rgb(hexcolor):
     """
     Convert hexadecimal color strings to RGB float tuple.
@@ -21,27 +91,58 @@ def hex_to_rgb(hexcolor):
     ----------
 
     hexcolor : str
-        Color as string specification.
+        Color as string specification, with or without leading '#'.
+        The three digit shorthand (e.g. '#f00') is expanded.
 
     Returns
     -------
 
     rgb : tuple of float
         The converted RGB float tuple.
+
+    Raises
+    ------
+
+    ValueError
+        If the string does not consist of 3 or 6 hexadecimal digits.
     """
-    hexcolor = hexcolor.lstrip('#')
-    hexcolor_rgb = []
-    for i in (0, 2, 4):
-        elem = int(hexcolor[i:i+2], 16) / 255
-        hexcolor_rgb.append(elem)
-    return tuple(hexcolor_rgb)
+    digits = hexcolor.lstrip('#')
+    if len(digits) == 3:
+        digits = ''.join(digit * 2 for digit in digits)
+    if len(digits) != 6:
+        raise ValueError(f'invalid hexadecimal RGB color: \'{hexcolor}\'')
+    value = int(digits, 16)
+    return ((value >> 16 & 0xFF) / 255, (value >> 8 & 0xFF) / 255, (value & 0xFF) / 255)
 
 
-def create_alpha_cmap(base_color, max_alpha=1.0, alpha_ticks=50):
+def fill_alpha_colorspec(colorspec: np.ndarray, base_color, max_alpha=1.0) -> np.ndarray:
+    """
+    Write the single-color alpha ramp into the preallocated (alpha_ticks, 4)
+    RGBA array `colorspec` in place and return it.
+    """
+    colorspec[:, :3] = base_color
+    colorspec[:, 3] = np.linspace(0, max_alpha, num=colorspec.shape[0])
+    return colorspec
+
+
+@functools.lru_cache(maxsize=64)
+def _alpha_colorspec(base_color: tuple, max_alpha: float, alpha_ticks: int) -> np.ndarray:
+    """Memoized read-only (alpha_ticks, 4) RGBA alpha ramp."""
+    colorspec = np.empty((alpha_ticks, 4), dtype=np.float32)
+    fill_alpha_colorspec(colorspec, base_color, max_alpha)
+    msg = f'Expected {(alpha_ticks, 4)}, got {colorspec.shape}'
+    assert colorspec.shape == (alpha_ticks, 4), msg
+    colorspec.flags.writeable = False
+    return colorspec
+
+
+def create_alpha_cmap(base_color, max_alpha=1.0, alpha_ticks=DEFAULT_ALPHA_TICKS):
     """
     Construct a single-color colormap that provides a smooth
     increase of the alpha value from 0 to max_alpha for the
     desired color.
+    The color ramps are memoized, every call returns a new
+    colormap instance.
 
     Parameters
     ----------
@@ -64,15 +165,8 @@ def create_alpha_cmap(base_color, max_alpha=1.0, alpha_ticks=50):
     alpha_map : matplotlib.colors.Colormap
         The colormap instance.
     """
-    alpha_range = np.linspace(0, max_alpha, num=alpha_ticks)[:, np.newaxis]
-    rgb_arr = np.array((base_color))[np.newaxis, :]    
-    
-    colorspec = np.concatenate(
-        [np.broadcast_to(rgb_arr, (alpha_range.shape[0], 3)), alpha_range],
-        axis=-1
-    )
-    msg = f'Expected {(alpha_ticks, 4)}, got {colorspec.shape}'
-    assert colorspec.shape == (alpha_ticks, 4), msg
+    base_color = tuple(float(channel) for channel in base_color)
+    colorspec = _alpha_colorspec(base_color, float(max_alpha), int(alpha_ticks))
     return matplotlib.colors.ListedColormap(colorspec)
 
 
@@ -140,9 +234,21 @@ class LabelOverlay:
         
         self.name = name
         self.labelarray = labelarray
-        self.img = parent_ax.imshow(labelarray.data[0, ...],
-                                    vmin=0, vmax=1, cmap=self._init_cmap())
+        # primary axis -> C-contiguous label data with that axis first
+        self._contiguous_data = {}
+        self._index = 0
+        self._stride = 1
+        self._extent_key = None
+        # label slices are colorized by a gather from a uint8 lookup table
+        # into reused staging buffers, reallocated on slice shape change
+        self._init_lut()
+        self._u8_buf = None
+        self._rgba_out = None
+        self.img = parent_ax.imshow(self._colorize(labelarray.data[0, ...]))
         self.parent_ax = parent_ax
+        self._debouncer = Debouncer()
+        # replaces the figure redraw, e.g. if displayed by a non-matplotlib renderer
+        self.draw_callback = None
         colorpicker_kwargs = colorpicker_kwargs or {}
         alphaslider_kwargs = alphaslider_kwargs or {}
         self.colorpicker = self._init_colorpicker(**colorpicker_kwargs)
@@ -166,11 +272,55 @@ class LabelOverlay:
         self.connect_alphaslider(alphaslider)
         return alphaslider
     
-    def _init_cmap(self) -> matplotlib.colors.Colormap:
-        return create_alpha_cmap((1, 0, 0), 0.25)
+    def _init_lut(self) -> None:
+        """
+        Create the overlay-owned alpha ramp colors and their RGBA byte
+        lookup table. The colors are mutated in place on color and alpha changes.
+        """
+        self._ramp_rgba = np.empty((DEFAULT_ALPHA_TICKS, 4), dtype=np.float32)
+        fill_alpha_colorspec(self._ramp_rgba, (1, 0, 0), 0.25)
+        self._lut = np.empty((DEFAULT_ALPHA_TICKS, 4), dtype=np.uint8)
+        self._update_lut()
+
+    def _update_lut(self) -> None:
+        """Rebuild the RGBA byte lookup table from the alpha ramp colors."""
+        self._lut[...] = np.rint(self._ramp_rgba * 255)
+
+    def _colorize(self, slc: np.ndarray) -> np.ndarray:
+        """
+        Map label values to RGBA bytes. Equivalent to the colormapping
+        of `slc` with the display range [0, 1], but computed as a single
+        gather from the lookup table into the reused staging buffers.
+        """
+        if self._u8_buf is None or self._u8_buf.shape != slc.shape:
+            self._u8_buf = np.empty(slc.shape, dtype=np.uint8)
+            self._rgba_out = np.empty((*slc.shape, 4), dtype=np.uint8)
+        n_colors = self._lut.shape[0]
+        quantize_u8(slc, n_colors, 0.0, out=self._u8_buf, max_level=n_colors - 1)
+        return np.take(self._lut, self._u8_buf, axis=0, out=self._rgba_out)
     
-    def setindex(self, new_index: int) -> None:
-        self.img.set_data(self.labelarray.data[new_index, ...])
+    def _label_data(self) -> np.ndarray:
+        """Label data for the current primary axis as memoized C-contiguous array."""
+        axis = self.labelarray.primary_axis
+        data = self._contiguous_data.get(axis)
+        if data is None:
+            data = np.ascontiguousarray(self.labelarray.data)
+            self._contiguous_data[axis] = data
+        return data
+
+    def setindex(self, new_index: int, stride: int = 1) -> None:
+        """
+        Display the label slice at `new_index`, subsampled by `stride`
+        along both in-plane axes.
+        """
+        self._index = new_index
+        self._stride = stride
+        slc = self._label_data()[new_index, ...]
+        self.img.set_data(self._colorize(slc[::stride, ::stride]))
+        extent_key = (slc.shape, stride)
+        if extent_key != self._extent_key:
+            self._extent_key = extent_key
+            self.img.set_extent(strided_extent(slc.shape, stride))
         
     def setaxis(self, new_axis: str) -> None:
         self.labelarray.primary_axis = new_axis
@@ -186,24 +336,37 @@ class LabelOverlay:
             Set the colormap of `axes_img` to a alpha colormap with
             the base color deduced from `change`.
             """
-            color = hex_to_rgb(change['new'])
-            cmap = create_alpha_cmap(color, self.alphaslider.value)
-            self.img.set_cmap(cmap)
-            self._draw_call()
+            self._pending = (change['new'], self.alphaslider.value)
+            self._debouncer.submit(self._apply_pending)
         
         colorpicker.observe(modify_color, names='value')
         
     def connect_alphaslider(self, alphaslider):
         
         def modify_alpha(change):
-            color = hex_to_rgb(self.colorpicker.value)
-            cmap = create_alpha_cmap(color, change['new'])
-            self.img.set_cmap(cmap)
-            self._draw_call()
+            self._pending = (self.colorpicker.value, change['new'])
+            self._debouncer.submit(self._apply_pending)
         
         alphaslider.observe(modify_alpha, names='value')
+
+    def _apply_pending(self) -> None:
+        """Apply the most recent (color, alpha) setting and redraw once."""
+        hexcolor, alpha = self._pending
+        fill_alpha_colorspec(self._ramp_rgba, hex_to_rgb(hexcolor), alpha)
+        self._update_lut()
+        # displayed RGBA data is precolorized: recolor the current slice
+        self.setindex(self._index, self._stride)
+        self._draw_call()
         
+    @property
+    def rgba(self) -> np.ndarray:
+        """Colorized RGBA bytes of the currently displayed label slice."""
+        return self._rgba_out
+
     def _draw_call(self) -> None:
+        if self.draw_callback is not None:
+            self.draw_callback()
+            return
         self.parent_ax.get_figure().canvas.draw_idle()
 
 
@@ -227,13 +390,27 @@ class LabelOverlayContainer:
     def __init__(self, *label_overlays: LabelOverlay) -> None:
         self._container = {lo.name : lo for lo in label_overlays}
     
-    def allset_index(self, new_index: int) -> None:
+    def allset_index(self, new_index: int, stride: int = 1) -> None:
         for lo in self._container.values():
-            lo.setindex(new_index)
+            lo.setindex(new_index, stride)
     
     def allset_axis(self, new_axis: str) -> None:
         for lo in self._container.values():
             lo.setaxis(new_axis)
+
+    def allset_draw_callback(self, callback) -> None:
+        for lo in self._container.values():
+            lo.draw_callback = callback
+
+    @property
+    def artists(self) -> list:
+        """Image artists of all label overlays in drawing order."""
+        return [lo.img for lo in self._container.values()]
+
+    @property
+    def rgba_images(self) -> list[np.ndarray]:
+        """Colorized RGBA slices of all label overlays in drawing order."""
+        return [lo.rgba for lo in self._container.values()]
     
     def get_control_tabs(self) -> wgt.Tab:
         """
@@ -1,32 +1,294 @@
+import matplotlib
+import numpy as np
+
+from matplotlib.colors import Colormap, Normalize
+
+try:
+    import ipycanvas
+except ImportError:
+    ipycanvas = None
+
+from quantools.visualization._kernels import quantize_u8
+from quantools.visualization.interactive.containers import (Debouncer, LabelOverlayContainer,
+                                                            display_stride, strided_extent)
+
+
+# Time window in seconds over which slider and axis events are coalesced
+SLIDER_COALESCE_DELAY = 0.05
+# Number of colormap entries / quantization levels of displayed slices
+QUANTIZATION_LEVELS = 256
+# Supported renderers of the slice display
+RENDERERS = ('matplotlib', 'ipycanvas')
 
 
 class LabeledSliceDisplay:
     """
     Visualize slices of volume data.
+
+    With the 'ipycanvas' renderer, precolorized slices and label overlays
+    are sent as raw RGBA data to the layers of an `ipycanvas.MultiCanvas`
+    instead of being rasterized by the matplotlib backend. The canvas
+    is part of the widget returned by `get_controls`.
     """
     cmap = CMAP_DEFAULT_CT
     auto_arraycast: bool = True
     auto_squeeze: bool = True
 
-    def __init__(self, volume: Array, labels: Dict[str, Array]) -> None:
+    def __init__(self, volume: Array, labels: Dict[str, Array],
+                 renderer: str = 'matplotlib') -> None:
+        if renderer not in RENDERERS:
+            raise ValueError(f'invalid renderer \'{renderer}\', must be one of {RENDERERS}')
+        if renderer == 'ipycanvas' and ipycanvas is None:
+            raise ImportError('renderer \'ipycanvas\' requires the ipycanvas package')
+        self.renderer = renderer
         self.fig = plt.figure()
         self.ax = self.fig.add_subplot()
+        self._disable_coordinate_readout()
         
-        self.volume = preprocess_array(volume, self.auto_arraycast,
-                                       self.auto_squeeze)
+        # id(input array) -> (input array, preprocessed array)
+        self._preprocessed = {}
+        self.volume = self._preprocess(volume)
+        # primary axis -> C-contiguous volume data with that axis first
+        self._contiguous_data = {}
+        # evaluate the full-volume statistics exactly once
+        stats = self.volume.stats
+        self._norm = Normalize(vmin=stats.min, vmax=stats.max)
+        # slices are pre-quantized to colormap indices and colorized by a
+        # lookup table: matplotlib then receives ready-made RGBA data and
+        # skips normalization, colormapping and resampling filters
+        self._display_cmap = self._quantized_cmap()
+        self._lut = self._display_cmap(np.arange(QUANTIZATION_LEVELS), bytes=True)
+        # staging buffers for quantized and colorized slices,
+        # reallocated on slice shape change
+        self._u8_buf = None
+        self._rgba_out = None
+        # slices larger than the axes view are subsampled to its pixel size
+        self._disp_hw = self._display_size()
+        self._index = 0
+        self._extent_key = None
         self.img = self.ax.imshow(
-            self.volume.data[0, ...], vmin=self.volume.stats.min,
-            vmax=self.volume.stats.max, cmap=self.cmap
+            np.zeros((1, 1, 4), dtype=np.uint8), interpolation='nearest', resample=False
         )
+        # initial view limits span the full slice
+        self.img.set_extent(strided_extent(self._volume_data().shape[1:], 1))
         
-        labels = {
-            name : preprocess_array(array, self.auto_arraycast, self.auto_squeeze)
-            for name, array in labels.items()
-        }
+        labels = {name : self._preprocess(array) for name, array in labels.items()}
         self.overlays= LabelOverlayContainer.from_dict(labels, self.ax)
+        self._render_index(0)
         
+        # only the most recent slider / axis value within a time window is rendered
+        self._pending_idx = None
+        self._pending_axis = None
+        self._slider_throttler = Debouncer(SLIDER_COALESCE_DELAY)
+        self._axis_throttler = Debouncer(SLIDER_COALESCE_DELAY)
+
         self.slider = self._init_slider()
         self.axis_selector = self._init_axis_selector()
+        if self.renderer == 'ipycanvas':
+            self._init_multicanvas()
+        else:
+            self._init_blitting()
+            self.fig.canvas.mpl_connect('resize_event', self._on_resize)
+            # zooming and panning change the visible data range
+            self.ax.callbacks.connect('xlim_changed', self._on_view_change)
+            self.ax.callbacks.connect('ylim_changed', self._on_view_change)
+
+
+    def _display_size(self) -> tuple[int, int]:
+        """Current (height, width) of the axes in display pixels."""
+        width, height = self.ax.bbox.size
+        return (int(height), int(width))
+
+
+    def _view_stride(self, shape: tuple[int, int]) -> int:
+        """
+        Subsampling stride for a slice of `shape` from the data range visible
+        in the current axes limits, so zoomed views show full resolution.
+        """
+        (x0, x1), (y0, y1) = self.ax.get_xlim(), self.ax.get_ylim()
+        visible = (min(shape[0], int(np.ceil(abs(y1 - y0)))),
+                   min(shape[1], int(np.ceil(abs(x1 - x0)))))
+        return display_stride(visible, self._disp_hw)
+
+
+    def _on_resize(self, event) -> None:
+        """Refresh display size and rerender if the subsampling stride changes."""
+        disp_hw = self._display_size()
+        if disp_hw == self._disp_hw:
+            return
+        self._disp_hw = disp_hw
+        self._on_view_change(self.ax)
+
+
+    def _on_view_change(self, ax) -> None:
+        """Rerender the current slice if the visible data range changes the stride."""
+        if self._extent_key is None:
+            return
+        shape, stride = self._extent_key
+        if self._view_stride(shape) != stride:
+            self._render_index(self._index)
+
+
+    def _disable_coordinate_readout(self) -> None:
+        """
+        Disable the cursor coordinate readout. With interactive backends,
+        it updates on every mouse move, e.g. with a kernel round trip in ipympl.
+        """
+        self.ax.format_coord = lambda x, y: ''
+        # ipympl canvas: the toolbar hosts the coordinate readout
+        if hasattr(self.fig.canvas, 'toolbar_visible'):
+            self.fig.canvas.toolbar_visible = False
+
+
+    def _preprocess(self, array) -> Array:
+        """
+        Preprocess the input array once per instance: the same array object
+        passed repeatedly, e.g. as volume and label or under several label
+        names, reuses the first result. Already wrapped arrays pass through.
+        """
+        if isinstance(array, Array):
+            return array
+        # keep a reference to the input so that its id cannot be reused
+        cached = self._preprocessed.get(id(array))
+        if cached is not None and cached[0] is array:
+            return cached[1]
+        result = preprocess_array(array, self.auto_arraycast, self.auto_squeeze)
+        self._preprocessed[id(array)] = (array, result)
+        return result
+
+
+    def _init_blitting(self) -> None:
+        """
+        Mark slice-dependent artists as animated and capture the static
+        axes background after every full draw.
+        """
+        self._background = None
+        self._animated_artists = [self.img, *self.overlays.artists]
+        for artist in self._animated_artists:
+            artist.set_animated(True)
+        self.fig.canvas.mpl_connect('draw_event', self._on_draw)
+        self.fig.canvas.draw()
+
+
+    def _init_multicanvas(self) -> None:
+        """
+        Create the canvas with one layer for the slice image and one layer
+        per label overlay. The matplotlib figure only serves as layout
+        reference for the display size and is not shown.
+        """
+        plt.close(self.fig)
+        n_layers = 1 + len(self.overlays.rgba_images)
+        height, width = self._rgba_out.shape[:2]
+        self.canvas = ipycanvas.MultiCanvas(n_layers, width=width, height=height)
+        self.overlays.allset_draw_callback(self._update_canvas)
+        self._put_layers()
+
+
+    def _put_layers(self) -> None:
+        """Send the current RGBA staging buffers to the canvas layers."""
+        height, width = self._rgba_out.shape[:2]
+        if (self.canvas.width, self.canvas.height) != (width, height):
+            self.canvas.width = width
+            self.canvas.height = height
+        images = [self._rgba_out, *self.overlays.rgba_images]
+        for i, image in enumerate(images):
+            self.canvas[i].put_image_data(image, 0, 0)
+
+
+    def _on_draw(self, event) -> None:
+        """Recapture background after full redraw and draw animated artists on top."""
+        self._background = self.fig.canvas.copy_from_bbox(self.ax.bbox)
+        self._draw_animated()
+
+
+    def _draw_animated(self) -> None:
+        for artist in self._animated_artists:
+            self.ax.draw_artist(artist)
+
+
+    def _update_canvas(self) -> None:
+        """
+        Redraw only the animated artists onto the cached background.
+        Falls back to a full redraw if blitting is not possible.
+        """
+        if self.renderer == 'ipycanvas':
+            self._put_layers()
+            return
+        canvas = self.fig.canvas
+        if self._background is None or not canvas.supports_blit:
+            canvas.draw_idle()
+            return
+        canvas.restore_region(self._background)
+        self._draw_animated()
+        canvas.blit(self.ax.bbox)
+        canvas.flush_events()
+
+
+    def _volume_data(self) -> np.ndarray:
+        """
+        Volume data for the current primary axis as C-contiguous array.
+        Memoized per axis, so every slice along the first axis is a
+        contiguous zero-copy view.
+        """
+        axis = self.volume.primary_axis
+        data = self._contiguous_data.get(axis)
+        if data is None:
+            data = np.ascontiguousarray(self.volume.data)
+            self._contiguous_data[axis] = data
+        return data
+
+
+    def _quantized_cmap(self) -> Colormap:
+        """Colormap resampled to one entry per quantization level."""
+        cmap = self.cmap
+        if not isinstance(cmap, Colormap):
+            cmap = matplotlib.colormaps[cmap]
+        return cmap.resampled(QUANTIZATION_LEVELS)
+
+
+    def _quantize(self, slc: np.ndarray) -> np.ndarray:
+        """
+        Map slice values to uint8 colormap indices using the display range
+        of `self._norm`. Matches the index computation of `Normalize` and
+        `Colormap` for a colormap with `QUANTIZATION_LEVELS` entries.
+        The result is written into the reused staging buffer `self._u8_buf`.
+        """
+        vmin, vmax = self._norm.vmin, self._norm.vmax
+        scale = QUANTIZATION_LEVELS / (vmax - vmin) if vmax > vmin else 0.0
+        if self._u8_buf is None or self._u8_buf.shape != slc.shape:
+            self._u8_buf = np.empty(slc.shape, dtype=np.uint8)
+        return quantize_u8(slc, scale, vmin, out=self._u8_buf,
+                           max_level=QUANTIZATION_LEVELS - 1)
+
+
+    def _colorize(self, indices: np.ndarray) -> np.ndarray:
+        """
+        Map uint8 colormap indices to RGBA bytes via a single gather from
+        the lookup table. The result is written into the reused staging
+        buffer `self._rgba_out`.
+        """
+        shape = (*indices.shape, 4)
+        if self._rgba_out is None or self._rgba_out.shape != shape:
+            self._rgba_out = np.empty(shape, dtype=np.uint8)
+        return np.take(self._lut, indices, axis=0, out=self._rgba_out)
+
+
+    def _render_index(self, new_idx: int) -> None:
+        """
+        Set image and overlay data to the slice at `new_idx`. Slices are
+        subsampled by an integer stride down to the axes pixel size over
+        the visible data range and keep the data coordinates of the
+        full-resolution slice.
+        """
+        self._index = new_idx
+        slc = self._volume_data()[new_idx, ...]
+        stride = self._view_stride(slc.shape)
+        self.img.set_data(self._colorize(self._quantize(slc[::stride, ::stride])))
+        extent_key = (slc.shape, stride)
+        if extent_key != self._extent_key:
+            self._extent_key = extent_key
+            self.img.set_extent(strided_extent(slc.shape, stride))
+        self.overlays.allset_index(new_idx, stride)
 
     
     def _init_slider(self) -> wgt.IntSlider:
@@ -53,34 +315,55 @@ class LabeledSliceDisplay:
         # Deduce slider maximum settable value from data primary axis. 
         slider.max = self.volume.data.shape[0] - 1
         slider.value = 0
+        # slice shape changed: explicitly render even if the slider value did not change
+        self._render_index(slider.value)
 
+        if self.renderer == 'ipycanvas':
+            self._update_canvas()
+            return
         self.ax.relim()
         self.ax.autoscale()
+        # full redraw also recaptures the blitting background
         self.fig.canvas.draw_idle()
 
     
     def connect_slider(self, slider: wgt.IntSlider):
 
         def on_slider_value_change(change):
-            new_idx = change['new']
-            self.img.set_data(self.volume.data[new_idx, ...])
-            self.overlays.allset_index(new_idx)
-            self.fig.canvas.draw_idle()
+            self._pending_idx = change['new']
+            self._slider_throttler.submit(self._flush_pending_index)
             return
 
         slider.observe(on_slider_value_change, names='value')
 
 
+    def _flush_pending_index(self) -> None:
+        """Render the most recently requested slice index."""
+        new_idx, self._pending_idx = self._pending_idx, None
+        if new_idx is None:
+            return
+        self._render_index(new_idx)
+        self._update_canvas()
+
+
     def connect_axis_selector(self, axis_selector):
 
         def on_axis_selector_value_change(change):
-            new_axis = change['new']
-            self.volume.primary_axis = new_axis
-            self.overlays.allset_axis(new_axis)
-            self._reinit_slider()
+            self._pending_axis = change['new']
+            self._axis_throttler.submit(self._flush_pending_axis)
             return
         
         axis_selector.observe(on_axis_selector_value_change, names='value')
+
+
+    def _flush_pending_axis(self) -> None:
+        """Switch to the most recently requested primary axis."""
+        new_axis, self._pending_axis = self._pending_axis, None
+        if new_axis is None:
+            return
+        self.volume.primary_axis = new_axis
+        self.overlays.allset_axis(new_axis)
+        self._reinit_slider()
     
 
     def get_controls(self, selector: str = 'all') -> wgt.HBox:
@@ -89,11 +372,14 @@ class LabeledSliceDisplay:
         """
         general_controls = wgt.HBox([self.slider, self.axis_selector])
         overlay_controls = self.overlays.get_control_tabs()
+        if self.renderer == 'ipycanvas':
+            return wgt.VBox([self.canvas, general_controls, overlay_controls])
         return wgt.VBox([general_controls, overlay_controls])
 
     
     @classmethod
-    def from_result(cls, result: Result, reduction: Union[int, str]) -> 'LabeledSliceDisplay':
+    def from_result(cls, result: Result, reduction: Union[int, str],
+                    renderer: str = 'matplotlib') -> 'LabeledSliceDisplay':
         """
         Create an instance directly from a `Result` object. The reduction argument
         allows selection of samples (integer index) or reduction (string 'mean' or 'variance')
@@ -113,6 +399,9 @@ class LabeledSliceDisplay:
             prediction. The argument has no effect if the prediction is not
             supersampled.
 
+        renderer : str, optional
+            Slice renderer, either 'matplotlib' or 'ipycanvas'.
+
         Returns
         -------
 
@@ -123,4 +412,4 @@ class LabeledSliceDisplay:
         label = result.annotated_volume.label
         segmentation = get_segmentation_helper(result.prediction, reduction)
         labels = {'gt' : label, 'pred' : segmentation}
-        return cls(raw, labels)
\ No newline at end of file
+        return cls(raw, labels, renderer=renderer)
\ No newline at end of file
@@ -3,7 +3,8 @@ Visualization utilities for the quantools package.
 
 @Author: Jannik Stebani 2024
 """
-import warnings
+import functools
+from operator import itemgetter
 from string import Template
 
 
@@ -51,9 +52,19 @@ SLICER_COLOR_SPECIFICATION: dict[str, str] = {
     'canals' : '#b17a65',
     'nerve' : '#6fb8d2'
 }
+
+# (mean, stdev) pair of a parameter statistics mapping
+MEAN_STD = itemgetter('mean', 'stdev')
+
+# case-folded and verbatim tissue names to slicer colors
+_SLICER_COLOR_CI: dict[str, str] = {
+    name.lower() : color for name, color in SLICER_COLOR_SPECIFICATION.items()
+}
+_SLICER_COLOR_CI.update(SLICER_COLOR_SPECIFICATION)
     
 
-def get_canonical_axis_label(parameter_name: str, unit: str):
+@functools.lru_cache(maxsize=32)
+def _canonical_axis_label(parameter_name: str, unit: str) -> tuple[tuple[str, str], ...]:
     labels = {}
     axes = {'xlabel' : 'x', 'ylabel' : 'y'}
     for key, axis in axes.items():
@@ -64,9 +75,30 @@ def get_canonical_axis_label(parameter_name: str, unit: str):
             
         labels[key] = label
     
-    return labels
+    return tuple(labels.items())
+
+
+def get_canonical_axis_label(parameter_name: str, unit: str) -> dict[str, str]:
+    """
+    Get the canonical 'xlabel' and 'ylabel' for the parameter with the unit
+    filled in. Substituted labels are memoized, the returned dictionary
+    is a fresh copy that may be modified by the caller.
+    """
+    return dict(_canonical_axis_label(parameter_name, unit))
     
 
+def get_figure(ax):
+    """
+    Get the figure containing `ax`. The figure is memoized on the axes,
+    so repeated plot calls onto the same axes skip the lookup.
+    """
+    fig = getattr(ax, '_qt_fig', None)
+    if fig is None:
+        fig = ax.get_figure()
+        ax._qt_fig = fig
+    return fig
+
+
 def get_color(patches) -> tuple[float, float, float]:
     """Get color of patch(es) in a bar container (i.e. `ax.hist` return value)"""
     patch = patches.patches[0]
@@ -74,14 +106,15 @@ def get_color(patches) -> tuple[float, float, float]:
 
 
 def get_value_and_uncert(name: str, parameters: dict[str, dict[str, float]]) -> tuple[float, float]:
-    value = parameters[name]['mean']
-    uncert = parameters[name]['stdev']
-    return (value, uncert)
+    return MEAN_STD(parameters[name])
 
 
 def get_canonical_tissue_color(name: str) -> str | None:
-    try:
-        return SLICER_COLOR_SPECIFICATION[name.lower()]
-    except KeyError:
+    # most tissue names are already lowercase: avoid lower() on the fast path
+    color = _SLICER_COLOR_CI.get(name)
+    if color is None:
+        color = _SLICER_COLOR_CI.get(name.lower())
+    if color is None:
+        import warnings
         warnings.warn(f'No canonical color specification for tissue "{name}".')
-        return None
\ No newline at end of file
+    return color
\ No newline at end of file
@@ -3,15 +3,104 @@ Tooling to plot errorbars of T1 and T2 relaxation times, magnetization values, a
 
 @Author: Jannik Stebani 2024
 """
+from __future__ import annotations
+
+import functools
+
 from collections.abc import Mapping
-from typing import Literal
+from typing import TYPE_CHECKING, Literal
+
+import numpy as np
+import matplotlib
 
-import matplotlib.pyplot as plt
-from matplotlib.axes import Axes
-from matplotlib.figure import Figure
+# pyplot and artist classes are imported on use: importing this module
+# does not bring up a matplotlib backend
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
+    from matplotlib.figure import Figure
 
 from quantools.segmentinfo.unit import Unit
-from quantools.visualization.utils import get_value_and_uncert
+from quantools.visualization.utils import MEAN_STD, get_figure
+
+
+# Axis label unit abbreviations, all other units are labeled as milliseconds
+_UNIT_STR: dict[Unit, str] = {
+    Unit.SECONDS : 's',
+    Unit.MILLISECONDS : 'ms'
+}
+
+_RELAXATION_TIME_NAMES: dict[str, str] = {
+    'T1' : '$T_1$ spin-lattice relaxation time',
+    'T2' : '$T_2$ spin-spin relaxation time'
+}
+
+
+def _as_unit(unit: Unit | str) -> Unit:
+    return unit if isinstance(unit, Unit) else Unit(unit)
+
+
+def _next_colors(ax: Axes, n: int) -> list[str]:
+    """
+    Take the next `n` colors from the property cycle of `ax`, advancing it
+    as `n` separate plot calls would. Empty lines are drawn from the cycle
+    and removed again.
+    """
+    if n == 0:
+        return []
+    lines = ax.plot(*([[], []] * n))
+    colors = [line.get_color() for line in lines]
+    for line in lines:
+        line.remove()
+    return colors
+
+
+def _draw_errorbars(ax: Axes, x, y, colors: list[str],
+                    xerr: np.ndarray | None = None,
+                    yerr: np.ndarray | None = None,
+                    marker: str = 'o',
+                    capsize: float = 5) -> None:
+    """
+    Draw individually colored markers with errorbars and caps for all points
+    with a constant number of artists instead of one errorbar container
+    per point.
+    """
+    # no errorbar caps: they only support a single color
+    ax.errorbar(x, y, xerr=xerr, yerr=yerr, fmt='none', ecolor=colors, capsize=0)
+    # caps as markers of size 2 * capsize, matching the errorbar cap style
+    cap_kwargs = {'s' : (2 * capsize) ** 2,
+                  'linewidths' : matplotlib.rcParams['lines.markeredgewidth']}
+    if capsize > 0 and yerr is not None:
+        ax.scatter([*x, *x], np.concatenate([y - yerr, y + yerr]), c=[*colors, *colors],
+                   marker='_', **cap_kwargs)
+    if capsize > 0 and xerr is not None:
+        ax.scatter(np.concatenate([x - xerr, x + xerr]), [*y, *y], c=[*colors, *colors],
+                   marker='|', **cap_kwargs)
+    ax.scatter(x, y, c=colors, marker=marker)
+
+
+def _add_legend_entries(ax: Axes, labels: list[str], colors: list[str], marker: str) -> None:
+    """
+    Register proxy legend entries on `ax` and draw the legend with all
+    entries of this and previous plot calls onto `ax`.
+    """
+    from matplotlib.lines import Line2D
+    # proxies of every plot call accumulate on the axes, a missing
+    # legend indicates a fresh or cleared axes
+    if ax.get_legend() is None or not hasattr(ax, '_qt_legend_proxies'):
+        ax._qt_legend_proxies = []
+    ax._qt_legend_proxies.extend(
+        Line2D([], [], color=color, marker=marker, linestyle='none', label=label)
+        for label, color in zip(labels, colors)
+    )
+    handles, _ = ax.get_legend_handles_labels()
+    ax.legend(handles=[*handles, *ax._qt_legend_proxies])
+
+
+@functools.lru_cache(maxsize=None)
+def _relaxation_time_label(parameter_name: Literal['T1', 'T2'], unit: Unit) -> str:
+    """Axis label of the relaxation time parameter in the given unit."""
+    unit_str = _UNIT_STR.get(unit, 'ms')
+    return f'{_RELAXATION_TIME_NAMES[parameter_name]} [{unit_str}]'
 
 
 def plot_parameter_single(tissues: Mapping[str, Mapping[str, float]],
@@ -19,7 +108,7 @@ def plot_parameter_single(tissues: Mapping[str, Mapping[str, float]],
                           ax: Axes | None = None,
                           xlabel: str | None = None,
                           ylabel: str | None = None,
-                          unit: Literal['seconds', 'milliseconds'] = 'seconds',
+                          unit: Unit | Literal['seconds', 'milliseconds'] = 'seconds',
                           ylim: tuple[float, float] | None = None,
                           capsize: float = 5,
                           restrict_errors: bool = True,
@@ -31,13 +120,13 @@ def plot_parameter_single(tissues: Mapping[str, Mapping[str, float]],
     Geared towards tissues of a single series.
     """
     if ax is None:
+        import matplotlib.pyplot as plt
         fig, ax = plt.subplots()
     else:
         ax = ax
-        fig = ax.get_figure()
+        fig = get_figure(ax)
         
-    unit = Unit(unit)
-    unit_str = 's' if unit is Unit.SECONDS else 'ms'
+    unit = _as_unit(unit)
     labels = {
         'xlabel' : 'Tissue Index',
         'ylabel' : 'Parameter Value'
@@ -47,24 +136,22 @@ def plot_parameter_single(tissues: Mapping[str, Mapping[str, float]],
     if ylabel:
         labels.update({'ylabel' : ylabel})
             
-    for index, (tissue_name, tissue_statistics) in enumerate(tissues.items()):
-
-        value = tissue_statistics[parameter_name]['mean']
-        uncert = tissue_statistics[parameter_name]['stdev']
+    names = list(tissues)
+    # (N, 2) array of (value, uncertainty) pairs
+    data = np.array([MEAN_STD(statistics[parameter_name]) for statistics in tissues.values()],
+                    dtype=np.float64).reshape(-1, 2)
+    values, uncerts = data[:, 0], data[:, 1]
 
-        if restrict_errors:
-            diff = value - uncert
-            uncert = uncert + diff if diff < 0 else uncert
+    if restrict_errors:
+        uncerts = np.minimum(uncerts, values)
 
-        display_tissue_name = f'{prefix}{tissue_name}{postfix}'
-
-        ax.errorbar(tissue_name, value,
-                    yerr=uncert, label=display_tissue_name, marker='o',
-                    capsize=capsize)
+    colors = _next_colors(ax, len(names))
+    _draw_errorbars(ax, names, values, colors, yerr=uncerts, marker='o', capsize=capsize)
         
     kwargs = {'ylim' : ylim}
     ax.set(**labels, **kwargs)
-    ax.legend()
+    display_tissue_names = [f'{prefix}{name}{postfix}' for name in names]
+    _add_legend_entries(ax, display_tissue_names, colors, marker='o')
     return (fig, ax)
 
 
@@ -73,7 +160,7 @@ def plot_T1_single(tissues: Mapping[str, Mapping[str, float]],
                    ax: Axes | None = None,
                    xlabel: str | None = None,
                    ylabel: str | None = None,
-                   unit: Literal['seconds', 'milliseconds'] = 'seconds',
+                   unit: Unit | Literal['seconds', 'milliseconds'] = 'seconds',
                    ylim: tuple[float, float] = (1.75, 5.0),
                    restrict_errors: bool = True,
                    prefix: str = '',
@@ -81,11 +168,10 @@ def plot_T1_single(tissues: Mapping[str, Mapping[str, float]],
                    **kwargs
                    ) -> tuple[Figure, Axes]:
     
-    unit = Unit(unit)
-    unit_str = 's' if unit is Unit.SECONDS else 'ms'
+    unit = _as_unit(unit)
     labels = {
         'xlabel' : 'Tissue Index',
-        'ylabel' : f'$T_1$ spin-lattice relaxation time [{unit_str}]'
+        'ylabel' : _relaxation_time_label('T1', unit)
     }
     return plot_parameter_single(tissues, parameter_name='T1', ax=ax, **labels,
                                  unit=unit, ylim=ylim, restrict_errors=restrict_errors,
@@ -98,7 +184,7 @@ def plot_T2_single(tissues: Mapping[str, Mapping[str, float]],
                    ax: Axes | None = None,
                    xlabel: str | None = None,
                    ylabel: str | None = None,
-                   unit: Literal['seconds', 'milliseconds'] = 'seconds',
+                   unit: Unit | Literal['seconds', 'milliseconds'] = 'seconds',
                    ylim: tuple[float, float] = (0.01, 2.0),
                    restrict_errors: bool = True,
                    prefix: str = '',
@@ -106,11 +192,10 @@ def plot_T2_single(tissues: Mapping[str, Mapping[str, float]],
                    **kwargs
                    ) -> tuple[Figure, Axes]:
     
-    unit = Unit(unit)
-    unit_str = 's' if unit is Unit.SECONDS else 'ms'
+    unit = _as_unit(unit)
     labels = {
         'xlabel' : 'Tissue Index',
-        'ylabel' : f'$T_2$ spin-spin relaxation time [{unit_str}]'
+        'ylabel' : _relaxation_time_label('T2', unit)
     }
     return plot_parameter_single(tissues, parameter_name='T2', ax=ax, **labels,
                                  unit=unit, ylim=ylim, restrict_errors=restrict_errors,
@@ -124,7 +209,7 @@ def plot_grouping(elements: Mapping[str, dict[str, float]],
                   xaxis: Literal['T1', 'T2'] = 'T1',
                   yaxis: Literal['T1', 'T2'] = 'T2',
                   capsize: float = 5,
-                  unit: Literal['seconds', 'milliseconds'] = 'seconds',
+                  unit: Unit | Literal['seconds', 'milliseconds'] = 'seconds',
                   prefix: str = '',
                   postfix : str = '',
                   marker: str = 'o',
@@ -153,7 +238,7 @@ def plot_grouping(elements: Mapping[str, dict[str, float]],
     capsize : float, optional
         Errorbar capsize. Default is 5.
 
-    unit : Literal['seconds', 'milliseconds'], optional
+    unit : Unit | Literal['seconds', 'milliseconds'], optional
         Unit of the relaxation times. Default is 'seconds'.
 
     prefix : str, optional
@@ -174,48 +259,42 @@ def plot_grouping(elements: Mapping[str, dict[str, float]],
         If True, restrict errorbars to positive values. Default is True.
     """
     if ax is None:
+        import matplotlib.pyplot as plt
         fig, ax = plt.subplots()
     else:
         ax = ax
-        fig = ax.get_figure()
+        fig = get_figure(ax)
         
-    unit = Unit(unit)
-    unit_str = 's' if unit is Unit.SECONDS else 'ms'
-    t1_lbl = f'$T_1$ spin-lattice relaxation time [{unit_str}]'
-    t2_lbl = f'$T_2$ spin-spin relaxation time [{unit_str}]'
+    unit = _as_unit(unit)
+    t1_lbl = _relaxation_time_label('T1', unit)
+    t2_lbl = _relaxation_time_label('T2', unit)
     
     if xaxis == 'T1' and yaxis == 'T2':
         xlabel = t1_lbl
         ylabel = t2_lbl
-    else:
+    elif xaxis == 'T2' and yaxis == 'T1':
         xlabel = t2_lbl
         ylabel = t1_lbl
+    else:
+        raise ValueError(f'invalid axis specification: {xaxis} and {yaxis}')
     labels = {'xlabel' : xlabel, 'ylabel' : ylabel}
+
+    # (N, 2) arrays of (value, uncertainty) pairs
+    xdata = np.array([MEAN_STD(parameters[xaxis]) for parameters in elements.values()],
+                     dtype=np.float64).reshape(-1, 2)
+    ydata = np.array([MEAN_STD(parameters[yaxis]) for parameters in elements.values()],
+                     dtype=np.float64).reshape(-1, 2)
+    x, xerr = xdata[:, 0], xdata[:, 1]
+    y, yerr = ydata[:, 0], ydata[:, 1]
+
+    if restrict_errors:
+        xerr = np.minimum(xerr, x)
+        yerr = np.minimum(yerr, y)
+
+    colors = _next_colors(ax, len(x))
+    _draw_errorbars(ax, x, y, colors, xerr=xerr, yerr=yerr, marker=marker, capsize=capsize)
     
-    for name, parameters in elements.items():
-        T1_value, T1_uncert = get_value_and_uncert('T1', parameters)
-        T2_value, T2_uncert = get_value_and_uncert('T2', parameters)
-        
-        if xaxis == 'T1' and yaxis == 'T2':
-            x, xerr = T1_value, T1_uncert
-            y, yerr = T2_value, T2_uncert
-        elif xaxis == 'T2' and yaxis == 'T1':
-            x, xerr = T2_value, T2_uncert
-            y, yerr = T1_value, T1_uncert
-        else:
-            raise ValueError(f'invalid axis specification: {xaxis} and {yaxis}')
-        
-        if restrict_errors:
-            xdiff = x - xerr
-            ydiff = y - yerr
-            xerr = xerr + xdiff if xdiff < 0 else xerr
-            yerr = yerr + ydiff if ydiff < 0 else yerr
-        
-        label = f'{prefix}{name}{postfix}'
-        ax.errorbar(x, y, xerr=xerr, yerr=yerr, marker=marker,
-                    capsize=capsize, label=label)
-    
-    ax.legend()
+    _add_legend_entries(ax, [f'{prefix}{name}{postfix}' for name in elements], colors, marker)
     ax.set(**labels)
     ax.set_title(axtitle)
     return (fig, ax)
\ No newline at end of file